@@ -34,8 +34,10 @@ def build_exec(python_path: Path, repo_root: Path) -> str:
     return f"{python_path} {main_py}"
 
 
-def make_desktop_entry(exec_cmd: str, icon: str = ICON_NAME, name: str = APP_NAME, comment: str = COMMENT_RU) -> str:
+def make_desktop_entry(exec_cmd: str, icon: str = ICON_NAME, name: str = APP_NAME, comment: str = COMMENT_RU,
+                       autostart: bool = False) -> str:
     # NOTE: we avoid quoting; Exec field accepts spaces separated args
+    autostart_block = "X-GNOME-Autostart-enabled=true\nOnlyShowIn=GNOME;Unity;\n" if autostart else ""
     return (
         "[Desktop Entry]\n"
         "Type=Application\n"
@@ -47,13 +49,14 @@ def make_desktop_entry(exec_cmd: str, icon: str = ICON_NAME, name: str = APP_NAM
         "Categories=Utility;Office;\n"
         f"StartupWMClass={APP_NAME}\n"
         "X-GNOME-UsesNotifications=true\n"
+        f"{autostart_block}"
     )
 
 
 def install_launcher(app_dir: Path, content: str) -> Path:
     app_dir.mkdir(parents=True, exist_ok=True)
     target = app_dir / LAUNCHER_FILENAME
-    target.write_text(content, encoding="utf-8")
+    target.write_bytes(content.encode("utf-8"))
     # Make it executable per desktop spec recommendations (not strictly required on GNOME)
     try:
         target.chmod(0o755)
@@ -101,15 +104,15 @@ def main() -> int:
         return 2
 
     exec_cmd = build_exec(py_path, repo_root)
-    desktop_text = make_desktop_entry(exec_cmd, icon=args.icon, name=args.name)
 
     created = []
     if not args.only_autostart:
+        desktop_text = make_desktop_entry(exec_cmd, icon=args.icon, name=args.name)
         launcher = install_launcher(APPLICATIONS_DIR, desktop_text)
         created.append(str(launcher))
     if not args.no_autostart:
-        # Autostart entry may include autostart-specific keys
-        autostart_text = desktop_text + "X-GNOME-Autostart-enabled=true\nOnlyShowIn=GNOME;Unity;\n"
+        # Autostart entry includes autostart-specific keys
+        autostart_text = make_desktop_entry(exec_cmd, icon=args.icon, name=args.name, autostart=True)
         auto = install_launcher(AUTOSTART_DIR, autostart_text)
         created.append(str(auto))
 
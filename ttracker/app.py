@@ -1,5 +1,7 @@
 import gi
 import logging
+import sys
+from collections import deque
 
 gi.require_version('Gtk', '3.0')
 try:
@@ -16,39 +18,68 @@ from gi.repository import Gtk, GLib, Gdk
 import datetime as dt
 from typing import List, Optional, Dict, Any
 
-from .storage import load_all, save_data, save_settings, new_empty_data, make_task_dict
-from .model import Task, task_from_dict, task_to_dict, find_task_by_id, stop_all, new_task
+from .storage import load_all, save_data, save_settings, append_journal, new_empty_data, make_task_dict
+from .model import Task, TaskIndex, task_from_dict, task_to_dict, stop_all, new_task
 from .hotkeys import GlobalHotkeys
 from .notify import show as notify_show
 from .util import parse_duration_delta, humanize_seconds, now, day_start
 from .ui import TTrackerWindow
-from .report import open_report_flow
 
 logger = logging.getLogger(__name__)
 
+# Resolved once; _on_window_state fires on every window-state change
+_WS_MAXIMIZED = Gdk.WindowState.MAXIMIZED
+
+# Pure modifier keys ignored while capturing a task hotkey
+_MODIFIER_KEYS = frozenset({
+    'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R',
+    'Super_L', 'Super_R', 'Meta_L', 'Meta_R', 'Hyper_L', 'Hyper_R',
+    'ISO_Level3_Shift', 'Caps_Lock', 'Num_Lock', 'Scroll_Lock',
+})
+
+# Distinct color palette (hex) — combined from matplotlib tab10 + Set3-like tones.
+# dict.fromkeys dedupes while preserving order (tab10 and the Paired-like
+# tail overlap), so _next_color never scans entries that can't be picked.
+# Frozen tuple of interned strings: immutable and one object per hex value.
+_PALETTE: tuple = tuple(dict.fromkeys(sys.intern(c) for c in (
+    # tab10
+    '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
+    '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
+    # Set3-like (avoid very light yellow/white-ish later)
+    '#8dd3c7', '#bebada', '#fb8072', '#80b1d3', '#fdb462',
+    '#b3de69', '#fccde5', '#bc80bd', '#ccebc5', '#ffed6f',
+    '#a6cee3', '#1f78b4', '#b2df8a', '#33a02c', '#fb9a99',
+    '#e31a1c', '#fdbf6f', '#ff7f00', '#cab2d6', '#6a3d9a',
+)))
+# Lowercased once at import; `used` sets are kept lowercase too, so
+# _next_color never re-lowercases per palette entry
+_PALETTE_LOWER: tuple = tuple(sys.intern(c.lower()) for c in _PALETTE)
+
 
 class App:
-    # Distinct color palette (hex) — combined from matplotlib tab10 + selected tab20 entries + Set3-like tones
-    _PALETTE = [
-        # tab10
-        '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
-        '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
-        # extra saturated selections (tab20 first of pairs)
-        '#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd',
-        '#8c564b', '#e377c2', '#7f7f7f', '#bcbd22', '#17becf',
-        # Set3-like (avoid very light yellow/white-ish later)
-        '#8dd3c7', '#bebada', '#fb8072', '#80b1d3', '#fdb462',
-        '#b3de69', '#fccde5', '#bc80bd', '#ccebc5', '#ffed6f',
-        '#a6cee3', '#1f78b4', '#b2df8a', '#33a02c', '#fb9a99',
-        '#e31a1c', '#fdbf6f', '#ff7f00', '#cab2d6', '#6a3d9a',
-    ]
 
     def __init__(self):
         st = load_all()
         self.data = st.data or new_empty_data()
         self.settings = st.settings
+        # Bind the hotkey map once; avoids .get('task_hotkeys', {}) chains
+        # (and throwaway empty dicts) on every lookup
+        self._task_hotkeys: Dict[str, str] = self.settings.setdefault('task_hotkeys', {})
         self.roots: List[Task] = [task_from_dict(d) for d in self.data.get('tasks', [])]
         self.active_task: Optional[Task] = None
+        # Flat cache of the whole tree plus an id -> Task index; both rebuilt
+        # on structure changes instead of re-walking the tree per lookup
+        self._flat_tasks: List[Task] = []
+        self.task_index = TaskIndex()
+        self._rebuild_flat_tasks()
+        # A timer may have been left running in the saved data
+        self.active_task = next((t for t in self._flat_tasks if t.is_running()), None)
+        # Set whenever task state changes; lets save_all skip rewriting the
+        # whole tree when nothing changed (e.g. idle autosave ticks)
+        self._dirty = True
+        # Start/stop/adjust are journaled immediately (durable, append-only)
+        # and the full snapshot rewrite is debounced behind this timeout id
+        self._snapshot_id = 0
 
         # Ensure every task has a persistent distinct color
         if self._ensure_task_colors():
@@ -61,7 +92,11 @@ class App:
         self.indicator = None
         self.window: Optional[TTrackerWindow] = None
         self.hotkeys = GlobalHotkeys()
-        self._goal_notified_today: Dict[str, dt.date] = {}
+        # Tasks already notified about a reached goal on the current (06:00-
+        # shifted) day; the set is swapped out on day rollover so it stays
+        # bounded no matter how long the app runs
+        self._notify_day: dt.date = day_start(now()).date()
+        self._notified_ids: set = set()
 
         # UI
         self.window = TTrackerWindow(
@@ -71,12 +106,16 @@ class App:
             on_set_goal=self.set_goal_dialog,
             on_set_hotkey=self.assign_hotkey_dialog,
             on_show_report=self.open_report,
-            on_save=self.save_all,
+            on_save=self._on_ui_change,
             hotkey_lookup=self._get_task_hotkey,
         )
-        # Track window geometry/state to preserve position/size across hide/show
+        # Track window geometry/state to preserve position/size across hide/show.
+        # configure-event fires for every pixel of a drag, so capture is
+        # debounced: the handler only flags, a short timeout does the reads.
         self._last_geometry = {}
         self._window_is_maximized = False
+        self._geom_dirty = False
+        self._geom_flush_id = 0
         self.window.connect('configure-event', self._on_window_configure)
         self.window.connect('window-state-event', self._on_window_state)
         self.window.connect('delete-event', self._on_window_delete)
@@ -100,9 +139,21 @@ class App:
         # Periodic check for goal reached while running (every 30s)
         GLib.timeout_add_seconds(30, self._goal_check_tick)
 
+    def _on_ui_change(self):
+        # UI mutation callbacks (add/rename/delete/reorder) funnel through here
+        self._dirty = True
+        self.save_all()
+        # A delete may have removed the running task; save_all just rebuilt
+        # the index, so an active task no longer in it is an orphan — stop
+        # it so goal checks and the idle-save skip stop chasing it
+        at = self.active_task
+        if at is not None and self.task_index.get(at.id) is not at:
+            at.stop()
+            self.active_task = None
+
     def _get_task_hotkey(self, task: Task) -> str:
         try:
-            return self.settings.get('task_hotkeys', {}).get(task.id, '')
+            return self._task_hotkeys.get(task.id, '')
         except Exception:
             return ''
 
@@ -197,31 +248,43 @@ class App:
                     self._last_geometry = {'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)}
                 except Exception:
                     pass
-            wcfg = dict(self.settings.get('window', {}) or {})
-            # Merge
+            # Mutate the settings dict in place — we own it, no copy needed
+            wcfg = self.settings.get('window')
+            if not isinstance(wcfg, dict):
+                wcfg = {}
+                self.settings['window'] = wcfg
             if getattr(self, '_last_geometry', None):
                 wcfg.update(self._last_geometry)
             wcfg['maximized'] = maximized
-            self.settings['window'] = wcfg
             save_settings(self.settings)
             logger.debug("Saved window geometry: %s", wcfg)
         except Exception as e:
             logger.debug("Failed to save window geometry: %s", e)
 
     def _on_window_configure(self, win, event):
-        # Track geometry when not maximized
-        try:
-            if not getattr(self, '_window_is_maximized', False):
-                x, y = self.window.get_position()
-                w, h = self.window.get_size()
-                self._last_geometry = {'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)}
-        except Exception:
-            pass
+        # Just flag; the actual Gdk roundtrips happen in _flush_geometry
+        self._geom_dirty = True
+        if not self._geom_flush_id:
+            self._geom_flush_id = GLib.timeout_add(250, self._flush_geometry)
+        return False
+
+    def _flush_geometry(self):
+        # Coalesced geometry capture for a burst of configure events
+        self._geom_flush_id = 0
+        if self._geom_dirty:
+            self._geom_dirty = False
+            try:
+                if not getattr(self, '_window_is_maximized', False):
+                    x, y = self.window.get_position()
+                    w, h = self.window.get_size()
+                    self._last_geometry = {'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)}
+            except Exception:
+                pass
         return False
 
     def _on_window_state(self, win, event):
         try:
-            maximized = bool(event.new_window_state & Gdk.WindowState.MAXIMIZED)
+            maximized = bool(event.new_window_state & _WS_MAXIMIZED)
             self._window_is_maximized = maximized
         except Exception:
             pass
@@ -278,11 +341,11 @@ class App:
         # Stop any running, possibly same task
         was_running = task.is_running()
         prev = stop_all(self.roots)
+        # At most one task runs at a time (stop_all above), so keep the active
+        # task authoritative instead of rescanning the tree later
+        self.active_task = task if not was_running else None
         # Reset daily-goal notification flag so that a new start can notify again
-        try:
-            self._goal_notified_today.pop(task.id, None)
-        except Exception:
-            pass
+        self._notified_ids.discard(task.id)
         if not was_running:
             task.start()
             logger.info("Started '%s'", task.name)
@@ -292,7 +355,20 @@ class App:
             notify_show("Таймер остановлен", f"{task.name}: сегодня {humanize_seconds(task.today_seconds())}")
         # Check goal after each toggle (start or stop)
         self._maybe_notify_goal(task)
-        self.save_all()
+        self._dirty = True
+        # Journal the events right away; the full snapshot is debounced
+        ts = now().isoformat()
+        try:
+            if prev is not None and prev is not task:
+                append_journal({'ts': ts, 'task_id': prev.id, 'event': 'stop'})
+            append_journal({'ts': ts, 'task_id': task.id, 'event': 'stop' if was_running else 'start'})
+        except Exception as e:
+            logger.debug("Journal append failed: %s", e)
+        self._schedule_save()
+        # The toggled row (and its ancestors) may be off-screen or the
+        # window hidden entirely; have the next tick sweep every row
+        if self.window:
+            self.window.request_full_refresh()
 
     def adjust_task_dialog(self, task: Task):
         logger.debug("Open adjust dialog for task '%s'", task.name)
@@ -319,7 +395,14 @@ class App:
             task.add_adjustment(delta)
             logger.info("Adjusted '%s' by %s", task.name, humanize_seconds(delta))
             self._maybe_notify_goal(task)
-            self.save_all()
+            self._dirty = True
+            try:
+                append_journal({'ts': now().isoformat(), 'task_id': task.id, 'event': 'adjust', 'delta_sec': int(delta)})
+            except Exception as e:
+                logger.debug("Journal append failed: %s", e)
+            self._schedule_save()
+            if self.window:
+                self.window.request_full_refresh()
         else:
             logger.debug("Adjust dialog canceled")
 
@@ -349,6 +432,7 @@ class App:
                 return
             task.daily_goal_sec = int(sec)
             logger.info("Daily target for '%s' set to %s", task.name, humanize_seconds(sec))
+            self._dirty = True
             self.save_all()
             # Immediately check if the goal is already met and notify
             self._maybe_notify_goal(task)
@@ -375,21 +459,16 @@ class App:
             return True
         if keyname == 'BackSpace':
             # remove hotkey
-            old = self.settings['task_hotkeys'].get(task.id)
+            old = self._task_hotkeys.get(task.id)
             logger.debug("Hotkey capture: clear existing '%s'", old)
             self.hotkeys.unbind(old or '')
-            self.settings['task_hotkeys'].pop(task.id, None)
+            self._task_hotkeys.pop(task.id, None)
             self.window.set_hotkey_text(task, '')
             save_settings(self.settings)
             dialog.destroy()
             return True
         # Ignore pure modifier keys
-        modifier_keys = {
-            'Shift_L','Shift_R','Control_L','Control_R','Alt_L','Alt_R',
-            'Super_L','Super_R','Meta_L','Meta_R','Hyper_L','Hyper_R',
-            'ISO_Level3_Shift','Caps_Lock','Num_Lock','Scroll_Lock'
-        }
-        if keyname in modifier_keys:
+        if keyname in _MODIFIER_KEYS:
             # keep dialog open, wait for a real key combined with modifiers
             return True
         # Build accelerator
@@ -398,10 +477,10 @@ class App:
         if not accel:
             return True
         # Rebind
-        old = self.settings['task_hotkeys'].get(task.id)
-        if self.hotkeys.rebind(old, accel, lambda t=task: self._hotkey_toggle_task(t)):
+        old = self._task_hotkeys.get(task.id)
+        if self.hotkeys.rebind(old, accel, lambda tid=task.id: self._hotkey_toggle_task(tid)):
             logger.debug("Assigned hotkey '%s' to task '%s'", accel, task.name)
-            self.settings['task_hotkeys'][task.id] = accel
+            self._task_hotkeys[task.id] = accel
             self.window.set_hotkey_text(task, accel)
             save_settings(self.settings)
         else:
@@ -409,47 +488,61 @@ class App:
         dialog.destroy()
         return True
 
-    def _hotkey_toggle_task(self, task: Task):
-        self.toggle_task(task)
+    def _hotkey_toggle_task(self, task_id: str):
+        # Resolve at press time through the index: the binding then goes
+        # dead (not stale) if the task was deleted meanwhile
+        task = self.task_index.get(task_id)
+        if task is not None:
+            self.toggle_task(task)
         # Ensure window remains hidden (do not steal focus)
 
     def _bind_all_hotkeys(self):
-        # Per-task
-        for t in self._walk(self.roots):
-            accel = self.settings.get('task_hotkeys', {}).get(t.id)
+        # Single pass: bind and update the UI text together, deferring the
+        # per-row redraws to one queue_draw at the end
+        for t in self._flat_tasks:
+            accel = self._task_hotkeys.get(t.id, '')
             if accel:
-                ok = self.hotkeys.bind(accel, lambda task=t: self._hotkey_toggle_task(task))
+                ok = self.hotkeys.bind(accel, lambda tid=t.id: self._hotkey_toggle_task(tid))
                 if ok:
                     logger.debug("Bound task hotkey '%s' for '%s'", accel, t.name)
                 else:
                     logger.warning("Failed to bind task hotkey '%s' for '%s'", accel, t.name)
-        # Update texts in UI
-        for t in self._walk(self.roots):
-            acc = self.settings.get('task_hotkeys', {}).get(t.id, '')
-            self.window.set_hotkey_text(t, acc)
+            self.window.set_hotkey_text(t, accel, defer=True)
+        self.window.queue_draw()
 
     def _walk(self, lst: List[Task]):
+        # Kept for callers that need to scope a walk to a subtree; whole-tree
+        # iteration should use the cached self._flat_tasks instead
         for t in lst:
             yield t
             yield from self._walk(t.children)
 
+    def _rebuild_flat_tasks(self) -> None:
+        # Iterative pre-order walk; avoids generator frames per level
+        flat: List[Task] = []
+        stack = list(reversed(self.roots))
+        while stack:
+            t = stack.pop()
+            flat.append(t)
+            stack.extend(reversed(t.children))
+        self._flat_tasks = flat
+        self.task_index.rebuild(self.roots)
+
     # ---- Colors management ----
     @staticmethod
     def _is_valid_color_hex(c: Optional[str]) -> bool:
-        if not isinstance(c, str):
-            return False
-        if len(c) != 7 or not c.startswith('#'):
+        if not isinstance(c, str) or len(c) != 7 or c[0] != '#':
             return False
+        # bytes.fromhex is a C fast path; no integer object gets created
         try:
-            int(c[1:], 16)
+            bytes.fromhex(c[1:])
             return True
-        except Exception:
+        except ValueError:
             return False
 
     def _next_color(self, used: set) -> str:
         # First pass: pick from predefined palette
-        for col in self._PALETTE:
-            lc = col.lower()
+        for lc in _PALETTE_LOWER:
             if lc not in used:
                 return lc
         # Fallback: generate via HSV golden ratio steps
@@ -463,22 +556,23 @@ class App:
 
     def _ensure_task_colors(self) -> bool:
         """Assign distinct palette colors to all tasks lacking color. Returns True if any assigned."""
+        is_valid = self._is_valid_color_hex
         used = set()
-        for t in self._walk(self.roots):
-            if self._is_valid_color_hex(getattr(t, 'color', None)):
+        for t in self._flat_tasks:
+            if is_valid(getattr(t, 'color', None)):
                 used.add(t.color.lower())
+        # Unused palette colors computed once (FIFO keeps palette order), so
+        # each assignment is O(1) instead of rescanning the palette
+        remaining = deque(c for c in _PALETTE_LOWER if c not in used)
         changed = False
-        def _assign(t: Task):
-            nonlocal changed, used
-            if not self._is_valid_color_hex(getattr(t, 'color', None)):
-                c = self._next_color(used)
+        # The flat cache is already in pre-order, so assignment order matches
+        # the old recursive walk
+        for t in self._flat_tasks:
+            if not is_valid(getattr(t, 'color', None)):
+                c = remaining.popleft() if remaining else self._next_color(used)
                 t.color = c
                 used.add(c)
                 changed = True
-            for ch in t.children:
-                _assign(ch)
-        for root in self.roots:
-            _assign(root)
         return changed
 
     def _message(self, text: str):
@@ -489,6 +583,9 @@ class App:
 
     def open_report(self):
         try:
+            # Deferred import: report pulls in matplotlib/numpy, which would
+            # otherwise slow down every cold start of an autostarted app
+            from .report import open_report_flow
             open_report_flow(self.window, self.roots)
         except Exception as e:
             logger.warning("Failed to open report: %s", e)
@@ -497,32 +594,55 @@ class App:
         if not task.daily_goal_sec:
             return
         # Use shifted day boundary (06:00 local time) as the notification key
-        today_key = day_start(now()).date()
-        if self._goal_notified_today.get(task.id) == today_key:
+        today = day_start(now()).date()
+        if today != self._notify_day:
+            self._notify_day = today
+            self._notified_ids.clear()
+        if task.id in self._notified_ids:
             return
         if task.today_seconds() >= task.daily_goal_sec:
             logger.info("Goal reached for '%s': today %s / target %s", task.name, humanize_seconds(task.today_seconds()), humanize_seconds(task.daily_goal_sec))
             notify_show("Цель по времени достигнута", f"{task.name}: сегодня {humanize_seconds(task.today_seconds())}")
-            self._goal_notified_today[task.id] = today_key
+            self._notified_ids.add(task.id)
 
     def _goal_check_tick(self):
-        # Check running tasks every minute
-        for t in self._walk(self.roots):
-            if t.is_running():
-                self._maybe_notify_goal(t)
+        # Only the active task can be running; checking it is O(1)
+        if self.active_task is not None and self.active_task.is_running():
+            self._maybe_notify_goal(self.active_task)
         return True
 
+    def _schedule_save(self):
+        # Coalesce snapshot rewrites: rapid toggles produce one write at most
+        # every 30s; the journal already made each event durable
+        if not self._snapshot_id:
+            self._snapshot_id = GLib.timeout_add_seconds(30, self._snapshot_tick)
+
+    def _snapshot_tick(self):
+        self._snapshot_id = 0
+        self.save_all()
+        return False
+
     def save_all(self):
+        # Skip serializing the whole tree when nothing changed; a running task
+        # still needs its elapsed time persisted, so it keeps the writes going
+        if not self._dirty and self.active_task is None:
+            logger.debug("Nothing to save; skipping")
+            return
+        # Every task add/delete path in the UI funnels through on_save, so this
+        # is the single place to refresh the flat cache after structure changes
+        self._rebuild_flat_tasks()
         # Ensure colors are assigned for all tasks before saving
         try:
             if self._ensure_task_colors():
                 logger.debug("Assigned colors to tasks before save")
+                self._dirty = True
         except Exception:
             pass
         # serialize tasks
         self.data['tasks'] = [task_to_dict(t) for t in self.roots]
         logger.debug("Saving data: %d root tasks", len(self.roots))
         save_data(self.data)
+        self._dirty = False
 
     def _autosave_tick(self):
         logger.debug("Autosave tick")
@@ -536,6 +656,9 @@ class App:
             self._persist_window_geometry()
         except Exception:
             pass
+        if self._snapshot_id:
+            GLib.source_remove(self._snapshot_id)
+            self._snapshot_id = 0
         self.save_all()
         try:
             if self.indicator is not None and hasattr(self.indicator, 'set_status'):
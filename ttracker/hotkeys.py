@@ -1,4 +1,4 @@
-from typing import Callable, Dict, Optional
+from typing import Callable, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,8 +12,10 @@ except Exception:  # pragma: no cover
 
 
 class GlobalHotkeys:
+    # Keybinder itself is the single source of truth for what is bound;
+    # no parallel Python-side bookkeeping to keep in sync.
+
     def __init__(self):
-        self.bound: Dict[str, Callable[[], None]] = {}
         if Keybinder is not None:
             try:
                 Keybinder.init()
@@ -28,10 +30,12 @@ class GlobalHotkeys:
         if not accel:
             return False
         try:
-            # Unbind same accel if used
-            if accel in self.bound:
+            # Unbind same accel if used; a no-op (or harmless error) if absent
+            try:
                 Keybinder.unbind(accel)
-            
+            except Exception:
+                pass
+
             def _handler(keystr=None):
                 try:
                     logger.debug("Global hotkey activated: %s", accel)
@@ -43,7 +47,6 @@ class GlobalHotkeys:
                     logger.exception("Global hotkey callback failed for %s: %s", accel, e)
             
             Keybinder.bind(accel, _handler)
-            self.bound[accel] = callback
             logger.debug("Global hotkey bound: %s", accel)
             return True
         except Exception as e:
@@ -51,14 +54,13 @@ class GlobalHotkeys:
             return False
 
     def unbind(self, accel: str) -> None:
-        if Keybinder is None:
+        if Keybinder is None or not accel:
             return
         try:
             Keybinder.unbind(accel)
             logger.debug("Global hotkey unbound: %s", accel)
         except Exception as e:
             logger.debug("Global hotkey unbind failed for '%s': %s", accel, e)
-        self.bound.pop(accel, None)
 
     def rebind(self, old: Optional[str], new: Optional[str], callback: Callable[[], None]) -> bool:
         if old:
@@ -3,30 +3,60 @@ import uuid
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any, Tuple
 
+import numpy as np
+
+from ._kernels import clip_sum
 from .util import now, day_start, week_range, month_range, split_by_day_boundary
 
 
-@dataclass
+# Slotted dataclasses: no per-instance __dict__, which matters for users with
+# hundreds of tasks and thousands of time entries walked on every tick.
+
+@dataclass(slots=True)
 class TimeEntry:
     start: dt.datetime
     end: Optional[dt.datetime]  # None while running
 
 
-@dataclass
+@dataclass(slots=True)
 class Adjustment:
     ts: dt.datetime
     delta_sec: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: str
     name: str
     color: Optional[str] = None
     children: List['Task'] = field(default_factory=list)
     daily_goal_sec: Optional[int] = None
+    # Whether the task's row is expanded in the tree view; persisted so the
+    # view only realizes branches the user actually keeps open
+    expanded: bool = True
     time_entries: List[TimeEntry] = field(default_factory=list)
     adjustments: List[Adjustment] = field(default_factory=list)
+    # Parallel arrays of epoch seconds mirroring time_entries/adjustments;
+    # aggregation runs vectorized over these instead of looping over datetime
+    # objects. The lists stay the write path; arrays are resynced lazily.
+    _starts: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    _ends: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    _adj_ts: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    _adj_delta: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+    _arrays_stale: bool = field(default=True, repr=False, compare=False)
+    # Entries are appended in wall-clock order, so the arrays are normally
+    # sorted by start; own_seconds then binary-searches the candidate slice
+    # for a bin instead of clip-summing the whole history. _max_dur bounds
+    # how far back an entry's start can be while still reaching into a bin.
+    _entries_sorted: bool = field(default=True, repr=False, compare=False)
+    _adj_sorted: bool = field(default=True, repr=False, compare=False)
+    _max_dur: float = field(default=0.0, repr=False, compare=False)
+    # Index of the currently open entry in time_entries (None when idle);
+    # makes is_running()/stop() O(1) instead of scanning the history
+    _running_idx: Optional[int] = field(default=None, repr=False, compare=False)
+    # Last tuple of values written to this task's tree row; the UI diffs
+    # against it to skip redundant set_value/row-changed emissions
+    _ui_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
 
     def add_child(self, child: 'Task') -> None:
         self.children.append(child)
@@ -35,78 +65,126 @@ class Task:
         self.children.remove(child)
 
     def is_running(self) -> bool:
-        return any(e.end is None for e in self.time_entries)
+        return self._running_idx is not None
 
     def start(self) -> None:
         if not self.is_running():
             self.time_entries.append(TimeEntry(start=now(), end=None))
+            self._running_idx = len(self.time_entries) - 1
+            self._arrays_stale = True
 
     def stop(self) -> None:
-        for e in reversed(self.time_entries):
-            if e.end is None:
-                e.end = now()
-                break
+        idx = self._running_idx
+        if idx is not None:
+            self.time_entries[idx].end = now()
+            self._running_idx = None
+            self._arrays_stale = True
 
     def add_adjustment(self, delta_sec: int) -> None:
         self.adjustments.append(Adjustment(ts=now(), delta_sec=delta_sec))
-
-    def own_seconds(self, start_ts: Optional[dt.datetime] = None, end_ts: Optional[dt.datetime] = None) -> int:
+        self._arrays_stale = True
+
+    def _sync_arrays(self) -> None:
+        # A running entry is stored with end=+inf; queries clip against now()
+        n = len(self.time_entries)
+        starts = np.empty(n, dtype=np.float64)
+        ends = np.empty(n, dtype=np.float64)
+        for i, e in enumerate(self.time_entries):
+            starts[i] = e.start.timestamp()
+            ends[i] = e.end.timestamp() if e.end is not None else np.inf
+        m = len(self.adjustments)
+        adj_ts = np.empty(m, dtype=np.float64)
+        adj_delta = np.empty(m, dtype=np.int64)
+        for i, a in enumerate(self.adjustments):
+            adj_ts[i] = a.ts.timestamp()
+            adj_delta[i] = a.delta_sec
+        self._set_arrays(starts, ends, adj_ts, adj_delta)
+
+    def _set_arrays(self, starts: np.ndarray, ends: np.ndarray,
+                    adj_ts: np.ndarray, adj_delta: np.ndarray) -> None:
+        # Shared by the lazy resync and the batch load path
+        self._starts = starts
+        self._ends = ends
+        self._adj_ts = adj_ts
+        self._adj_delta = adj_delta
+        self._entries_sorted = bool(np.all(starts[1:] >= starts[:-1])) if starts.size > 1 else True
+        self._adj_sorted = bool(np.all(adj_ts[1:] >= adj_ts[:-1])) if adj_ts.size > 1 else True
+        durations = ends - starts
+        finite = durations[np.isfinite(durations)]
+        self._max_dur = float(finite.max()) if finite.size else 0.0
+        self._arrays_stale = False
+
+    def own_seconds(self, start_ts: Optional[dt.datetime] = None, end_ts: Optional[dt.datetime] = None,
+                    now_ts: Optional[dt.datetime] = None) -> int:
         """
         Compute time for this task only (its own time entries and adjustments),
         excluding any children contributions. Time is clipped to [start_ts, end_ts) if provided.
+        Callers aggregating many tasks pass now_ts so "now" is computed once.
         """
+        if self._arrays_stale:
+            self._sync_arrays()
         total = 0
-        # own entries
-        for e in self.time_entries:
-            s = e.start
-            e_end = e.end or now()
-            if start_ts or end_ts:
-                s_clip = s if not start_ts else max(s, start_ts)
-                e_clip = e_end if not end_ts else min(e_end, end_ts)
-                if e_clip > s_clip:
-                    total += int((e_clip - s_clip).total_seconds())
-            else:
-                total += int((e_end - s).total_seconds())
+        # own entries (clip-and-sum kernel over epoch seconds; a running
+        # entry has end=+inf and is clipped against now())
+        if self._starts.size:
+            lo = start_ts.timestamp() if start_ts is not None else 0.0
+            hi = (now_ts or now()).timestamp()
+            if end_ts is not None:
+                hi = min(hi, end_ts.timestamp())
+            starts, ends = self._starts, self._ends
+            if self._entries_sorted:
+                # Slice to entries that can intersect [lo, hi): start < hi,
+                # and start > lo - max_dur (anything earlier ended before lo).
+                # The open entry has end=+inf, so it must stay in the slice.
+                i1 = int(np.searchsorted(starts, hi, side='left'))
+                i0 = int(np.searchsorted(starts, lo - self._max_dur, side='right'))
+                if self._running_idx is not None and self._running_idx < i1:
+                    i0 = min(i0, self._running_idx)
+                starts, ends = starts[i0:i1], ends[i0:i1]
+            if starts.size:
+                total += int(clip_sum(starts, ends, lo, hi))
         # own adjustments
-        for a in self.adjustments:
-            if (start_ts is None or a.ts >= start_ts) and (end_ts is None or a.ts < end_ts):
-                total += a.delta_sec
+        if self._adj_delta.size:
+            if start_ts is None and end_ts is None:
+                total += int(self._adj_delta.sum())
+            elif self._adj_sorted:
+                a0 = int(np.searchsorted(self._adj_ts, start_ts.timestamp(), side='left')) if start_ts is not None else 0
+                a1 = int(np.searchsorted(self._adj_ts, end_ts.timestamp(), side='left')) if end_ts is not None else self._adj_ts.size
+                total += int(self._adj_delta[a0:a1].sum())
+            else:
+                mask = np.ones(self._adj_ts.size, dtype=bool)
+                if start_ts is not None:
+                    mask &= self._adj_ts >= start_ts.timestamp()
+                if end_ts is not None:
+                    mask &= self._adj_ts < end_ts.timestamp()
+                total += int(self._adj_delta[mask].sum())
         return total
 
     # Aggregations (includes children)
-    def aggregate_seconds(self, start_ts: Optional[dt.datetime] = None, end_ts: Optional[dt.datetime] = None) -> int:
+    def aggregate_seconds(self, start_ts: Optional[dt.datetime] = None, end_ts: Optional[dt.datetime] = None,
+                          now_ts: Optional[dt.datetime] = None) -> int:
+        # Explicit stack: no Python call per node and no recursion limit on
+        # deep trees. "now" is resolved once for the whole subtree.
+        now_ts = now_ts or now()
         total = 0
-        # own entries
-        for e in self.time_entries:
-            s = e.start
-            e_end = e.end or now()
-            if start_ts or end_ts:
-                s_clip = s if not start_ts else max(s, start_ts)
-                e_clip = e_end if not end_ts else min(e_end, end_ts)
-                if e_clip > s_clip:
-                    total += int((e_clip - s_clip).total_seconds())
-            else:
-                total += int((e_end - s).total_seconds())
-        # own adjustments
-        for a in self.adjustments:
-            if (start_ts is None or a.ts >= start_ts) and (end_ts is None or a.ts < end_ts):
-                total += a.delta_sec
-        # children
-        for c in self.children:
-            total += c.aggregate_seconds(start_ts, end_ts)
+        stack = [self]
+        while stack:
+            t = stack.pop()
+            total += t.own_seconds(start_ts, end_ts, now_ts=now_ts)
+            stack.extend(t.children)
         return total
 
     def today_seconds(self) -> int:
         n = now()
-        return self.aggregate_seconds(*_range_day(n))
+        return self.aggregate_seconds(*_range_day(n), now_ts=n)
 
     def week_seconds(self) -> int:
         n = now()
-        return self.aggregate_seconds(*week_range(n))
+        return self.aggregate_seconds(*week_range(n), now_ts=n)
 
     def month_seconds(self) -> int:
         n = now()
-        return self.aggregate_seconds(*month_range(n))
+        return self.aggregate_seconds(*month_range(n), now_ts=n)
 
     def total_seconds(self) -> int:
         return self.aggregate_seconds()
@@ -121,23 +199,56 @@ def _range_day(ts: dt.datetime) -> Tuple[dt.datetime, dt.datetime]:
 
 # Tree operations and serialization
 
+def _parse_ts(v) -> dt.datetime:
+    # Schema v2 stores epoch seconds as ints (one C call to parse); legacy
+    # files and journal records still carry ISO strings
+    if isinstance(v, (int, float)):
+        return dt.datetime.fromtimestamp(v).astimezone()
+    return dt.datetime.fromisoformat(v)
+
+
 def task_from_dict(d: Dict[str, Any]) -> Task:
     t = Task(
         id=d.get('id') or uuid.uuid4().hex,
         name=d.get('name') or "Unnamed",
         color=d.get('color'),
         daily_goal_sec=d.get('daily_goal_sec'),
+        expanded=bool(d.get('expanded', True)),
         time_entries=[],
         adjustments=[],
         children=[],
     )
+    # Collect raw epoch values alongside; if every timestamp arrived as a v2
+    # int, the SoA arrays are built here in one shot and the lazy per-entry
+    # .timestamp() resync never runs for loaded history
+    raw_starts: List[float] = []
+    raw_ends: List[float] = []
+    raw_adj_ts: List[float] = []
+    numeric = True
     for e in d.get('time_entries', []):
-        s = dt.datetime.fromisoformat(e['start'])
-        e_end = dt.datetime.fromisoformat(e['end']) if e.get('end') else None
+        sv, ev = e['start'], e.get('end')
+        if numeric and isinstance(sv, (int, float)) and (ev is None or isinstance(ev, (int, float))):
+            raw_starts.append(sv)
+            raw_ends.append(np.inf if ev is None else ev)
+        else:
+            numeric = False
+        s = _parse_ts(sv)
+        e_end = _parse_ts(ev) if ev is not None else None
+        if e_end is None:
+            t._running_idx = len(t.time_entries)
         t.time_entries.append(TimeEntry(start=s, end=e_end))
     for a in d.get('adjustments', []):
-        ts = dt.datetime.fromisoformat(a['ts'])
-        t.adjustments.append(Adjustment(ts=ts, delta_sec=int(a['delta_sec'])))
+        tv = a['ts']
+        if numeric and isinstance(tv, (int, float)):
+            raw_adj_ts.append(tv)
+        else:
+            numeric = False
+        t.adjustments.append(Adjustment(ts=_parse_ts(tv), delta_sec=int(a['delta_sec'])))
+    if numeric:
+        t._set_arrays(np.array(raw_starts, dtype=np.float64),
+                      np.array(raw_ends, dtype=np.float64),
+                      np.array(raw_adj_ts, dtype=np.float64),
+                      np.array([a.delta_sec for a in t.adjustments], dtype=np.int64))
     for ch in d.get('children', []):
         t.children.append(task_from_dict(ch))
     return t
@@ -149,27 +260,62 @@ def task_to_dict(t: Task) -> Dict[str, Any]:
         'name': t.name,
         'color': t.color,
         'daily_goal_sec': t.daily_goal_sec,
+        'expanded': t.expanded,
         'time_entries': [
-            {'start': e.start.isoformat(), 'end': e.end.isoformat() if e.end else None}
+            {'start': int(e.start.timestamp()), 'end': int(e.end.timestamp()) if e.end else None}
             for e in t.time_entries
         ],
         'adjustments': [
-            {'ts': a.ts.isoformat(), 'delta_sec': int(a.delta_sec)} for a in t.adjustments
+            {'ts': int(a.ts.timestamp()), 'delta_sec': int(a.delta_sec)} for a in t.adjustments
         ],
         'children': [task_to_dict(c) for c in t.children],
     }
 
 
 def find_task_by_id(root_list: List[Task], task_id: str) -> Optional[Task]:
-    for t in root_list:
+    # One-off lookup; repeated lookups should go through a TaskIndex
+    stack = list(root_list)
+    while stack:
+        t = stack.pop()
         if t.id == task_id:
             return t
-        found = find_task_by_id(t.children, task_id)
-        if found:
-            return found
+        stack.extend(t.children)
     return None
 
 
+class TaskIndex:
+    """Flat id -> Task map mirroring the tree.
+
+    Rebuilt in one pass after structural changes, it turns repeated
+    find_task_by_id walks into dict lookups. parent_list maps a task id to
+    the sibling list containing it (roots map to the root list), which is
+    what move/delete operations need.
+    """
+
+    __slots__ = ('by_id', 'parent_list')
+
+    def __init__(self, root_list: Optional[List[Task]] = None):
+        self.by_id: Dict[str, Task] = {}
+        self.parent_list: Dict[str, List[Task]] = {}
+        if root_list is not None:
+            self.rebuild(root_list)
+
+    def rebuild(self, root_list: List[Task]) -> None:
+        by_id: Dict[str, Task] = {}
+        parent_list: Dict[str, List[Task]] = {}
+        stack = [(t, root_list) for t in reversed(root_list)]
+        while stack:
+            t, siblings = stack.pop()
+            by_id[t.id] = t
+            parent_list[t.id] = siblings
+            stack.extend((c, t.children) for c in reversed(t.children))
+        self.by_id = by_id
+        self.parent_list = parent_list
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self.by_id.get(task_id)
+
+
 def stop_all(root_list: List[Task]) -> Optional[Task]:
     prev = None
     for t in walk_tasks(root_list):
@@ -180,9 +326,13 @@ def stop_all(root_list: List[Task]) -> Optional[Task]:
 
 
 def walk_tasks(root_list: List[Task]):
-    for t in root_list:
+    # Pre-order DFS with an explicit stack: one generator frame total,
+    # instead of one per tree level with `yield from`
+    stack = list(reversed(root_list))
+    while stack:
+        t = stack.pop()
         yield t
-        yield from walk_tasks(t.children)
+        stack.extend(reversed(t.children))
 
 
 def move_task_within_parent(parent_list: List[Task], index: int, direction: int) -> int:
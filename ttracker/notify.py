@@ -1,10 +1,16 @@
 import gi
 
-gi.require_version('Notify', '0.7')
-from gi.repository import Notify
+# Loaded on first notification instead of at import time: libnotify setup
+# is off the app's cold-start path
+Notify = None
 
 
 def ensure_inited():
+    global Notify
+    if Notify is None:
+        gi.require_version('Notify', '0.7')
+        from gi.repository import Notify as _Notify
+        Notify = _Notify
     if not Notify.is_initted():
         try:
             Notify.init("ttracker")
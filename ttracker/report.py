@@ -1,21 +1,21 @@
+import functools
 import gi
 import datetime as dt
 from dataclasses import dataclass
 from typing import List, Dict, Tuple, Optional
 
+from ._kernels import bin_entries
 from .util import now, day_start, day_end, week_range, month_range, humanize_seconds
 from .model import Task
 
 # GTK
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, GLib
 
-# Matplotlib (GTK3 backend)
-from matplotlib.backends.backend_gtk3agg import FigureCanvasGTK3Agg as FigureCanvas
-from matplotlib.figure import Figure
-from matplotlib.offsetbox import AnnotationBbox, TextArea, HPacker, VPacker, DrawingArea
+# NumPy is already loaded for the model's aggregation arrays; matplotlib is
+# imported inside show_chart_window so building a report's numbers (or simply
+# importing this module) doesn't pay for the plotting stack
 import numpy as np
-import matplotlib.patches as mpatches
 
 
 @dataclass
@@ -165,20 +165,27 @@ def choose_params_dialog(parent: Optional[Gtk.Window]) -> Optional[ReportParams]
 
 
 def build_bins(start: dt.datetime, end: dt.datetime, aggregation: str) -> List[Tuple[dt.datetime, dt.datetime, str]]:
+    # Day/week edges are a fixed stride apart after the first boundary
+    # (timestamps carry a fixed UTC offset), so derive the first edge once
+    # and advance by timedelta instead of re-running day_start/week_range
+    # per bin. Month edges are irregular and keep the explicit walk.
     bins: List[Tuple[dt.datetime, dt.datetime, str]] = []
-    cur = start
     if aggregation == 'days':
-        while cur < end:
-            ds = day_start(cur)
-            de = ds + dt.timedelta(days=1)
+        one_day = dt.timedelta(days=1)
+        ds = day_start(start)
+        while ds < end:
+            de = ds + one_day
             bins.append((ds, min(de, end), ds.strftime('%Y-%m-%d')))
-            cur = de
+            ds = de
     elif aggregation == 'weeks':
-        while cur < end:
-            ws, we = week_range(cur)
-            bins.append((ws, min(we, end), f"{ws.strftime('%Y-%m-%d')}..{(min(we, end)-dt.timedelta(seconds=1)).strftime('%Y-%m-%d')}"))
-            cur = we
+        one_week = dt.timedelta(days=7)
+        ws, we = week_range(start)
+        while ws < end:
+            e_clip = min(we, end)
+            bins.append((ws, e_clip, f"{ws.strftime('%Y-%m-%d')}..{(e_clip - dt.timedelta(seconds=1)).strftime('%Y-%m-%d')}"))
+            ws, we = we, we + one_week
     elif aggregation == 'months':
+        cur = start
         while cur < end:
             ms, me = month_range(cur)
             bins.append((ms, min(me, end), ms.strftime('%Y-%m')))
@@ -192,27 +199,100 @@ def compute_breakdown(roots: List[Task], bins: List[Tuple[dt.datetime, dt.dateti
     """
     Returns list aligned with bins. For each bin: dict root_task -> dict(part_name -> seconds)
     part_name is child.name for direct children (inclusive of their subtree), plus '__other__' for root's own time.
+
+    All tasks' entries are flattened into one SoA with a task-id side array
+    and handed to the fused bin_entries kernel against all bin edges at once;
+    only the subtree roll-up and the result dicts stay in Python.
     """
+    if not bins:
+        return []
+    n_sec = now().timestamp()
+    # Flatten the tree pre-order, remembering each task's parent row
+    tasks: List[Task] = []
+    parent_row: List[int] = []
+    stack = [(t, -1) for t in reversed(roots)]
+    while stack:
+        t, pr = stack.pop()
+        ti = len(tasks)
+        tasks.append(t)
+        parent_row.append(pr)
+        stack.extend((c, ti) for c in reversed(t.children))
+    n_tasks = len(tasks)
+    n_bins = len(bins)
+
+    # Bin edges as epoch seconds; entry ends are additionally clipped by now()
+    # (an open entry is stored with end=+inf)
+    bin_lo = np.array([s.timestamp() for (s, _, _) in bins])
+    bin_hi = np.array([e.timestamp() for (_, e, _) in bins])
+    bin_hi_now = np.minimum(bin_hi, n_sec)
+
+    own = np.zeros((n_tasks, n_bins))
+    starts_list, ends_list, ids_list = [], [], []
+    adj_ts_list, adj_delta_list, adj_ids_list = [], [], []
+    for ti, t in enumerate(tasks):
+        if t._arrays_stale:
+            t._sync_arrays()
+        if t._starts.size:
+            starts_list.append(t._starts)
+            ends_list.append(t._ends)
+            ids_list.append(np.full(t._starts.size, ti, dtype=np.int64))
+        if t._adj_ts.size:
+            adj_ts_list.append(t._adj_ts)
+            adj_delta_list.append(t._adj_delta)
+            adj_ids_list.append(np.full(t._adj_ts.size, ti, dtype=np.int64))
+    if starts_list:
+        bin_entries(np.concatenate(starts_list), np.concatenate(ends_list),
+                    np.concatenate(ids_list), bin_lo, bin_hi_now, own)
+    own = own.astype(np.int64)
+    if adj_ts_list:
+        adj_ts = np.concatenate(adj_ts_list)
+        adj_delta = np.concatenate(adj_delta_list)
+        adj_ids = np.concatenate(adj_ids_list)
+        # Adjustments fall in the bin containing their timestamp (no clipping
+        # by now(), matching own_seconds)
+        for b in range(n_bins):
+            sel = (adj_ts >= bin_lo[b]) & (adj_ts < bin_hi[b])
+            if sel.any():
+                own[:, b] += np.bincount(adj_ids[sel], weights=adj_delta[sel],
+                                         minlength=n_tasks).astype(np.int64)
+
+    # Subtree roll-up: children precede parents when walking pre-order in
+    # reverse, so one backwards pass accumulates bottom-up
+    agg = own.copy()
+    for ti in range(n_tasks - 1, 0, -1):
+        pr = parent_row[ti]
+        if pr >= 0:
+            agg[pr] += agg[ti]
+
+    row_of = {id(t): ti for ti, t in enumerate(tasks)}
     result: List[Dict[str, Dict[str, int]]] = []
-    for (s, e, _label) in bins:
+    for b in range(n_bins):
         per_root: Dict[str, Dict[str, int]] = {}
         for root in roots:
             parts: Dict[str, int] = {}
             # children inclusive
             for ch in root.children:
-                sec = ch.aggregate_seconds(s, e)
+                sec = int(agg[row_of[id(ch)], b])
                 if sec:
                     parts[ch.name] = sec
             # other = own-only
-            own = root.own_seconds(s, e)
-            if own:
-                parts['other'] = own
+            own_sec = int(own[row_of[id(root)], b])
+            if own_sec:
+                parts['other'] = own_sec
             per_root[root.name] = parts
         result.append(per_root)
     return result
 
 
-def _hex_to_rgb01(hex_color: str) -> Tuple[float, float, float]:
+# Shared tuples for the 'other' segment and unknown colors; also used as
+# fill values for the per-(root, part) color matrix below
+_OTHER_RGB = (0.7, 0.7, 0.7)
+_FALLBACK_RGB = (0.2, 0.5, 0.9)
+
+
+@functools.lru_cache(maxsize=256)
+def _hex_to_rgb01(hex_color: Optional[str]) -> Tuple[float, float, float]:
+    # Task colors repeat across reports; the cache skips re-parsing them
     hex_color = (hex_color or '').strip()
     if len(hex_color) == 7 and hex_color.startswith('#'):
         r = int(hex_color[1:3], 16) / 255.0
@@ -220,7 +300,7 @@ def _hex_to_rgb01(hex_color: str) -> Tuple[float, float, float]:
         b = int(hex_color[5:7], 16) / 255.0
         return (r, g, b)
     # fallback blue-ish
-    return (0.2, 0.5, 0.9)
+    return _FALLBACK_RGB
 
 
 def build_color_lookup(roots: List[Task]) -> Dict[Tuple[str, str], Tuple[float, float, float]]:
@@ -235,6 +315,12 @@ def build_color_lookup(roots: List[Task]) -> Dict[Tuple[str, str], Tuple[float,
 
 
 def show_chart_window(parent: Optional[Gtk.Window], roots: List[Task], bins, breakdown, aggregation: str):
+    # Matplotlib (GTK3 backend) — deferred to first chart
+    from matplotlib.backends.backend_gtk3agg import FigureCanvasGTK3Agg as FigureCanvas
+    from matplotlib.figure import Figure
+    from matplotlib.offsetbox import AnnotationBbox, TextArea, HPacker, VPacker, DrawingArea
+    import matplotlib.patches as mpatches
+
     win = Gtk.Window(title="TTracker Report")
     win.set_transient_for(parent)
     win.set_default_size(1100, 650)
@@ -248,40 +334,45 @@ def show_chart_window(parent: Optional[Gtk.Window], roots: List[Task], bins, bre
     labels = [label for (_, _, label) in bins]
     x = np.arange(len(labels))
     n_roots = max(1, len(roots))
+    n_bins = len(labels)
     width = 0.8 / n_roots
-    # Collect rectangles for hover tooltips: list of (rect, root_index, bin_index)
-    bars_meta: List[Tuple[object, int, int]] = []
     bars_for_labels: List[Tuple[np.ndarray, np.ndarray, str]] = []
 
+    # Flatten the breakdown dicts once into a (root, part, bin) seconds matrix;
+    # bars, stacking bottoms and legend metrics all read from it instead of
+    # chasing nested dict lookups per cell.
+    # For consistent stacking order, use sorted part names present anywhere per root.
+    parts_by_root: Dict[str, List[str]] = {
+        root.name: sorted({p for b in breakdown for p in b.get(root.name, {}).keys()})
+        for root in roots
+    }
+    max_parts = max((len(p) for p in parts_by_root.values()), default=0)
+    part_index: Dict[str, Dict[str, int]] = {
+        rn: {pn: pi for pi, pn in enumerate(parts)} for rn, parts in parts_by_root.items()
+    }
+    mat = np.zeros((len(roots), max_parts, n_bins))
+    for bi, per_root_bin in enumerate(breakdown):
+        for ri, root in enumerate(roots):
+            part_idx = part_index[root.name]
+            for pn, sec in per_root_bin.get(root.name, {}).items():
+                mat[ri, part_idx[pn], bi] = sec
+    hours = mat / 3600.0
+    # Stacking bottoms: exclusive cumulative sum along the part axis
+    bottoms_all = np.cumsum(hours, axis=1) - hours
+    # RGB triples parallel to the matrix; bars, legend and tooltips all index
+    # colors[ri, pi] instead of a dict lookup per segment
+    colors = np.empty((len(roots), max_parts, 3))
+    colors[:] = _FALLBACK_RGB
+    for ri, root in enumerate(roots):
+        for pn, pi in part_index[root.name].items():
+            colors[ri, pi] = _OTHER_RGB if pn == 'other' else color_lookup.get((root.name, pn), _FALLBACK_RGB)
+
     # Draw grouped stacked bars (no hatching; colors by root/subtask)
-    totals_per_root = [np.zeros(len(labels)) for _ in roots]
-    # Accumulate per-root totals across the whole selected period for legend values
-    totals_sec_per_root_part: Dict[str, Dict[str, int]] = {r.name: {} for r in roots}
     for ri, root in enumerate(roots):
         offsets = x - 0.4 + width/2 + ri * width
-        bottoms = np.zeros(len(labels))
-        # For consistent stacking order, use sorted part names present anywhere for this root
-        part_names = sorted({p for b in breakdown for p in b.get(root.name, {}).keys()})
-        for pn in part_names:
-            vals = []
-            total_sec = 0
-            for bi, _ in enumerate(labels):
-                sec = breakdown[bi].get(root.name, {}).get(pn, 0)
-                total_sec += sec
-                vals.append(sec / 3600.0)
-            if pn == 'other':
-                color = (0.7, 0.7, 0.7)
-            else:
-                color = color_lookup.get((root.name, pn), (0.2, 0.5, 0.9))
-            rects = ax.bar(offsets, vals, width, bottom=bottoms, color=color, edgecolor='black', linewidth=0.2)
-            # Track rectangles for hover tooltips per (day, root)
-            for bi, rect in enumerate(rects):
-                bars_meta.append((rect, ri, bi))
-            bottoms += np.array(vals)
-            if total_sec > 0:
-                totals_sec_per_root_part[root.name][pn] = totals_sec_per_root_part[root.name].get(pn, 0) + total_sec
-        totals_per_root[ri] = bottoms.copy()
-        bars_for_labels.append((offsets, totals_per_root[ri].copy(), root.name))
+        for pi, pn in enumerate(parts_by_root[root.name]):
+            ax.bar(offsets, hours[ri, pi], width, bottom=bottoms_all[ri, pi], color=colors[ri, pi], edgecolor='black', linewidth=0.2)
+        bars_for_labels.append((offsets, hours[ri].sum(axis=0), root.name))
 
     # Ensure headroom on Y-axis so labels fit within the chart and then draw labels
     try:
@@ -314,79 +405,54 @@ def show_chart_window(parent: Optional[Gtk.Window], roots: List[Task], bins, bre
     ax.set_xticklabels(labels, rotation=45, ha='right')
     ax.grid(True, axis='y', linestyle='--', alpha=0.3)
 
-    # Reserve wider right margin for hierarchical legend/metrics
-    fig.tight_layout(rect=[0.0, 0.0, 0.70, 1.0])
+    # The chart takes the full figure now; the legend lives in a native
+    # TreeView beside the canvas instead of a matplotlib side axes
+    fig.tight_layout(rect=[0.0, 0.0, 1.0, 1.0])
 
-    # Build hierarchical legend panel with colored squares and metrics (no mathtext)
-    # Precompute per-root/per-part per-bin seconds
-    bins_count = len(labels)
-    stats_per_root_part: Dict[str, Dict[str, List[int]]] = {r.name: {} for r in roots}
-    for root in roots:
-        part_names = sorted({p for b in breakdown for p in b.get(root.name, {}).keys()})
-        for pn in part_names:
-            per_bin = [breakdown[bi].get(root.name, {}).get(pn, 0) for bi in range(len(labels))]
-            stats_per_root_part[root.name][pn] = per_bin
-
-    # Count lines to layout
-    header_gap_weight = 1.35  # spacing after root headers
-    header_pre_gap_weight = 0.65  # spacing before root headers
-    total_lines = 0.0
-    for root in roots:
-        # account for both pre-gap and post-header gap plus subtask lines
-        total_lines += header_pre_gap_weight + header_gap_weight
-        total_lines += len(stats_per_root_part.get(root.name, {}))
-    if total_lines == 0:
-        total_lines = 1.0
-
-    # Create a side axes for the hierarchical legend
-    legend_ax = fig.add_axes([0.72, 0.05, 0.27, 0.90])
-    legend_ax.set_axis_off()
     # Overlay axes for tooltips (drawn last, above everything)
     overlay_ax = fig.add_axes([0, 0, 1, 1])
     overlay_ax.set_axis_off()
     overlay_ax.set_zorder(10000)
 
-    # Layout parameters (axes fraction)
-    y = 0.98
-    raw_line_h = 0.9 / max(1, total_lines)
-    # Cap maximum spacing to keep legend compact when there are few lines
-    line_h = min(0.035, raw_line_h)
-    rect_w = 0.06
-
-    for root in roots:
+    # Hierarchical legend as a Gtk.TreeView: one ListStore fill instead of
+    # hundreds of text/patch Artists re-painted on every canvas redraw.
+    # Columns: swatch color, swatch visible, row text, font weight.
+    bins_count = len(labels)
+    legend_store = Gtk.ListStore(str, bool, str, int)
+    for ri, root in enumerate(roots):
         # Root totals per bin
-        root_per_bin = [sum(breakdown[bi].get(root.name, {}).values()) for bi in range(len(labels))]
-        total = float(sum(root_per_bin))
+        root_per_bin = mat[ri].sum(axis=0)
+        total = float(root_per_bin.sum())
         avg = total / max(1, bins_count)
-        min_v = float(min(root_per_bin)) if root_per_bin else 0.0
-        max_v = float(max(root_per_bin)) if root_per_bin else 0.0
+        min_v = float(root_per_bin.min()) if n_bins else 0.0
+        max_v = float(root_per_bin.max()) if n_bins else 0.0
         header = f"{root.name}: {humanize_seconds(int(total))} (avg. {avg/3600.0:.1f}h, [{min_v/3600.0:.1f}h - {max_v/3600.0:.1f}h])"
-        # Use center alignment for header to keep spacing consistent with subtask rows
-        y -= line_h * header_pre_gap_weight
-        legend_ax.text(0.0, y, header, fontsize=9, fontweight='bold', va='center', transform=legend_ax.transAxes)
-        y -= line_h * header_gap_weight
+        legend_store.append(['#ffffff', False, header, 700])
         # Subtasks sorted by total desc
-        items = []
-        for pn, per_bin in stats_per_root_part.get(root.name, {}).items():
-            s = float(sum(per_bin))
-            items.append((pn, per_bin, s))
-        items.sort(key=lambda t: t[2], reverse=True)
-        for pn, per_bin, s in items:
+        items = [(pn, pi, mat[ri, pi], float(mat[ri, pi].sum()))
+                 for pi, pn in enumerate(parts_by_root[root.name])]
+        items.sort(key=lambda t: t[3], reverse=True)
+        for pn, pi, per_bin, s in items:
             avg_p = s / max(1, bins_count)
-            min_p = float(min(per_bin)) if per_bin else 0.0
-            max_p = float(max(per_bin)) if per_bin else 0.0
+            min_p = float(per_bin.min()) if n_bins else 0.0
+            max_p = float(per_bin.max()) if n_bins else 0.0
             title = 'прочее' if pn == 'other' else pn
-            col = (0.7, 0.7, 0.7) if pn == 'other' else color_lookup.get((root.name, pn), (0.2, 0.5, 0.9))
-            # Make legend color bars pleasantly thick: ~60% of line height, with safe min/max caps
-            rect_h = min(max(0.010, line_h * 0.60), 0.028)
-            # Colored bar (horizontal)
-            legend_ax.add_patch(mpatches.FancyBboxPatch((0.0, y - rect_h/2), rect_w, rect_h,
-                                                        boxstyle="square,pad=0.0",
-                                                        facecolor=col, edgecolor='black', linewidth=0.2,
-                                                        transform=legend_ax.transAxes))
-            text = f" {title} — {humanize_seconds(int(s))} (avg. {avg_p/3600.0:.1f}h, [{min_p/3600.0:.1f}h - {max_p/3600.0:.1f}h])"
-            legend_ax.text(rect_w + 0.01, y, text, fontsize=9, va='center', transform=legend_ax.transAxes)
-            y -= line_h
+            swatch = '#%02x%02x%02x' % tuple(int(v * 255) for v in colors[ri, pi])
+            text = f"{title} — {humanize_seconds(int(s))} (avg. {avg_p/3600.0:.1f}h, [{min_p/3600.0:.1f}h - {max_p/3600.0:.1f}h])"
+            legend_store.append([swatch, True, text, 400])
+
+    legend_view = Gtk.TreeView(model=legend_store)
+    legend_view.set_headers_visible(False)
+    legend_view.get_selection().set_mode(Gtk.SelectionMode.NONE)
+    r_swatch = Gtk.CellRendererText()
+    r_swatch.set_property('text', '    ')
+    col_swatch = Gtk.TreeViewColumn('', r_swatch)
+    col_swatch.add_attribute(r_swatch, 'background', 0)
+    col_swatch.add_attribute(r_swatch, 'background-set', 1)
+    legend_view.append_column(col_swatch)
+    r_text = Gtk.CellRendererText()
+    col_text = Gtk.TreeViewColumn('', r_text, text=2, weight=3)
+    legend_view.append_column(col_text)
 
     # Hover tooltip per bar implemented as AnnotationBbox on a top overlay axes
     tooltip_ab = None  # type: ignore
@@ -405,7 +471,7 @@ def show_chart_window(parent: Optional[Gtk.Window], roots: List[Task], bins, bre
             if sec <= 0:
                 continue
             title = 'прочее' if pn == 'other' else pn
-            col = (0.7, 0.7, 0.7) if pn == 'other' else color_lookup.get((root.name, pn), (0.2, 0.5, 0.9))
+            col = colors[ri, part_index[root.name][pn]]
             da = DrawingArea(10, 10, 0, 0)
             da.add_artist(mpatches.Rectangle((0, 0), 12, 7, facecolor=col, edgecolor='#222222', linewidth=0.5))
             label = TextArea(f" {title} — {humanize_seconds(int(sec))}", textprops=dict(size=9, color='black'))
@@ -444,41 +510,73 @@ def show_chart_window(parent: Optional[Gtk.Window], roots: List[Task], bins, bre
 
     canvas = FigureCanvas(fig)
 
-    def _on_move(event):
-        nonlocal tooltip_ab
-        # Show per-day legend with data when hovering a bar (any stacked segment)
-        if event.inaxes not in (ax, overlay_ax):
-            if tooltip_ab is not None:
-                try:
-                    tooltip_ab.remove()
-                except Exception:
-                    pass
-                tooltip_ab = None
-                canvas.draw_idle()
-            return
-        for rect, ri, bi in bars_meta:
-            contains, _ = rect.contains(event)
-            if contains:
-                _show_tooltip(event, ri, bi)
-                canvas.draw_idle()
-                return
-        if tooltip_ab is not None:
+    # Hover hit-testing from bar geometry instead of per-rect contains():
+    # bin group bi spans [bi - 0.4, bi + 0.4) in data coords, root ri owns
+    # its width-slice of the group, and the stack tops come from the matrix
+    tot_hours = hours.sum(axis=1)  # (n_roots, n_bins)
+
+    def _hit_test(event) -> Optional[Tuple[int, int]]:
+        xd, yd = event.xdata, event.ydata
+        if xd is None or yd is None or yd < 0:
+            return None
+        bi = int(np.floor(xd + 0.5))
+        if not (0 <= bi < n_bins):
+            return None
+        rel = xd - (bi - 0.4)
+        if not (0.0 <= rel < 0.8):
+            return None
+        ri = int(rel / width)
+        if ri >= len(roots) or yd > tot_hours[ri, bi]:
+            return None
+        return (ri, bi)
+
+    # Motion events are throttled to ~60fps and the last hit is memoized, so
+    # dragging the cursor inside one bar triggers no redraw at all
+    last_hit: Optional[Tuple[int, int]] = None
+    pending_event = None
+    throttle_id = 0
+
+    def _process_motion():
+        nonlocal tooltip_ab, last_hit, pending_event, throttle_id
+        throttle_id = 0
+        event, pending_event = pending_event, None
+        if event is None:
+            return False
+        hit = _hit_test(event) if event.inaxes in (ax, overlay_ax) else None
+        if hit == last_hit:
+            return False
+        last_hit = hit
+        if hit is not None:
+            _show_tooltip(event, *hit)
+        elif tooltip_ab is not None:
             try:
                 tooltip_ab.remove()
             except Exception:
                 pass
             tooltip_ab = None
-            canvas.draw_idle()
+        canvas.draw_idle()
+        return False
+
+    def _on_move(event):
+        nonlocal pending_event, throttle_id
+        pending_event = event
+        if not throttle_id:
+            throttle_id = GLib.timeout_add(16, _process_motion)
 
     canvas.mpl_connect("motion_notify_event", _on_move)
 
-    box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
-    box.set_spacing(0)
+    box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+    box.set_spacing(6)
     box.set_margin_top(6)
     box.set_margin_bottom(6)
     box.set_margin_start(6)
     box.set_margin_end(6)
     box.pack_start(canvas, True, True, 0)
+    legend_scroll = Gtk.ScrolledWindow()
+    legend_scroll.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+    legend_scroll.add(legend_view)
+    legend_scroll.set_size_request(330, -1)
+    box.pack_start(legend_scroll, False, True, 0)
 
     win.add(box)
     
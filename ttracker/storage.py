@@ -1,12 +1,25 @@
+import json
 import os
-import shutil
 import yaml
+try:
+    # libyaml bindings: ~10x faster parse, same safe_* semantics
+    from yaml import CSafeLoader as _YamlLoader, CSafeDumper as _YamlDumper
+except ImportError:  # pragma: no cover - pyyaml built without libyaml
+    from yaml import SafeLoader as _YamlLoader, SafeDumper as _YamlDumper
 from dataclasses import dataclass
 from typing import Any, Dict, Tuple
 
 DATA_DIR = os.path.expanduser("~/.ttracker")
-DATA_FILE = os.path.join(DATA_DIR, "data.yaml")
-DATA_BACKUP_FILE = os.path.join(DATA_DIR, "data-backup.yaml")
+# Task data lives in JSON: parsing/serializing it is an order of magnitude
+# faster than YAML, which dominates startup and blocks the UI on every save
+# once the history grows. Settings stay in YAML (tiny, hand-edited).
+DATA_FILE = os.path.join(DATA_DIR, "data.json")
+DATA_BACKUP_FILE = os.path.join(DATA_DIR, "data-backup.json")
+# Pre-JSON data file; migrated to DATA_FILE on first run that finds it
+LEGACY_DATA_FILE = os.path.join(DATA_DIR, "data.yaml")
+# Append-only journal of start/stop/adjust events since the last snapshot;
+# keeps every toggle durable without rewriting the whole history each time
+JOURNAL_FILE = os.path.join(DATA_DIR, "journal.ndjson")
 SETTINGS_FILE = os.path.join(DATA_DIR, "settings.yaml")
 
 
@@ -27,16 +40,91 @@ DEFAULT_SETTINGS = {
 }
 
 
+def _find_task_dict(tasks, task_id):
+    stack = list(tasks)
+    while stack:
+        t = stack.pop()
+        if t.get('id') == task_id:
+            return t
+        stack.extend(t.get('children') or [])
+    return None
+
+
+def _replay_journal(data: Dict[str, Any]) -> bool:
+    """Apply journaled events on top of the last snapshot. Returns True if any applied."""
+    if not os.path.exists(JOURNAL_FILE):
+        return False
+    applied = False
+    with open(JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            td = _find_task_dict(data.get('tasks', []), rec.get('task_id'))
+            if td is None:
+                continue
+            event = rec.get('event')
+            if event == 'start':
+                entries = td.setdefault('time_entries', [])
+                if not any(e.get('end') is None for e in entries):
+                    entries.append({'start': rec['ts'], 'end': None})
+                    applied = True
+            elif event == 'stop':
+                for e in reversed(td.get('time_entries') or []):
+                    if e.get('end') is None:
+                        e['end'] = rec['ts']
+                        applied = True
+                        break
+            elif event == 'adjust':
+                td.setdefault('adjustments', []).append({'ts': rec['ts'], 'delta_sec': int(rec.get('delta_sec', 0))})
+                applied = True
+    return applied
+
+
+def append_journal(record: Dict[str, Any]) -> None:
+    """Durably append one event record; called on every start/stop/adjust."""
+    ensure_dirs()
+    with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.flush()
+        try:
+            os.fsync(f.fileno())
+        except OSError:
+            pass
+
+
+def _clear_journal() -> None:
+    try:
+        if os.path.exists(JOURNAL_FILE):
+            os.unlink(JOURNAL_FILE)
+    except OSError:
+        pass
+
+
 def load_all() -> Storage:
     ensure_dirs()
     if os.path.exists(DATA_FILE):
         with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f) or {}
+            data = json.load(f) or {}
+    elif os.path.exists(LEGACY_DATA_FILE):
+        # One-time migration: parse the old YAML once and rewrite as JSON.
+        # The YAML file is left in place as an extra safety copy.
+        with open(LEGACY_DATA_FILE, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=_YamlLoader) or {}
+        if data:
+            save_data(data)
     else:
         data = {}
+    # Events recorded after the last snapshot (e.g. before a crash)
+    if data and _replay_journal(data):
+        save_data(data)
     if os.path.exists(SETTINGS_FILE):
         with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-            settings = yaml.safe_load(f) or {}
+            settings = yaml.load(f, Loader=_YamlLoader) or {}
     else:
         settings = {}
     merged_settings = DEFAULT_SETTINGS.copy()
@@ -48,27 +136,38 @@ def load_all() -> Storage:
 
 def save_data(data: Dict[str, Any]) -> None:
     ensure_dirs()
-    # Backup previous data
+    # Snapshots are always written in the current schema, whatever was loaded
+    data['version'] = 2
+    # Write to a temp file and rename: atomic on POSIX, and the previous
+    # snapshot becomes the backup via a rename instead of a full copy
+    tmp = DATA_FILE + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        # indent + ensure_ascii=False keep the file human-readable like the
+        # YAML it replaces
+        json.dump(data, f, ensure_ascii=False, indent=2)
     if os.path.exists(DATA_FILE):
         try:
-            shutil.copy2(DATA_FILE, DATA_BACKUP_FILE)
-        except Exception:
+            os.replace(DATA_FILE, DATA_BACKUP_FILE)
+        except OSError:
             pass
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        yaml.safe_dump(data, f, sort_keys=False, allow_unicode=True)
+    os.replace(tmp, DATA_FILE)
+    # The snapshot supersedes everything journaled so far
+    _clear_journal()
 
 
 def save_settings(settings: Dict[str, Any]) -> None:
     ensure_dirs()
     with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
-        yaml.safe_dump(settings, f, sort_keys=False, allow_unicode=True)
+        yaml.dump(settings, f, Dumper=_YamlDumper, sort_keys=False, allow_unicode=True)
 
 
 # Schema helpers
 
 def new_empty_data() -> Dict[str, Any]:
     return {
-        "version": 1,
+        # v2: time_entries/adjustments timestamps are epoch-second ints
+        # (loading still accepts the v1 ISO strings)
+        "version": 2,
         "tasks": [],  # list of task dicts recursively
         "active_task_id": None,
         "active_started_at": None,  # ISO timestamp
@@ -82,6 +181,6 @@ def make_task_dict(task_id: str, name: str) -> Dict[str, Any]:
         "color": None,
         "children": [],
         "daily_goal_sec": None,  # int seconds or None
-        "time_entries": [],  # list of {start: iso, end: iso}
-        "adjustments": [],  # list of {ts: iso, delta_sec: int}
+        "time_entries": [],  # list of {start: epoch int, end: epoch int|None}
+        "adjustments": [],  # list of {ts: epoch int, delta_sec: int}
     }
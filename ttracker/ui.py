@@ -1,5 +1,7 @@
+import datetime as dt
 import gi
 import logging
+from collections import deque
 
 gi.require_version('Gtk', '3.0')
 from gi.repository import Gtk, Gdk, GLib
@@ -11,11 +13,13 @@ except Exception:  # pragma: no cover
     GdkX11 = None  # type: ignore
 from typing import List, Optional, Callable, Tuple
 
-from .model import Task, new_task, move_task_within_parent
-from .util import humanize_seconds
+from .model import Task, new_task, move_task_within_parent, walk_tasks
+from .util import humanize_seconds, day_start, now, week_range, month_range
 
 logger = logging.getLogger(__name__)
 
+_ONE_DAY = dt.timedelta(days=1)
+
 
 # TreeStore columns
 COL_TASK_OBJ = 0
@@ -67,6 +71,11 @@ class TTrackerWindow(Gtk.Window):
         btn_report.connect('clicked', lambda *_: self.on_show_report())
         topbar.pack_start(btn_report, False, False, 0)
 
+        # TreeStore deliberately, not a flat ListStore+depth column: native
+        # expand/collapse (persisted per task), expand_to_path, iter_parent
+        # for ancestor updates and in-place sibling swaps all come for free,
+        # while a TreeModelFilter-based flat view would re-filter every row
+        # on each toggle. Bulk mutation stays cheap via set_model(None).
         self.store = Gtk.TreeStore(object, str, str, bool, str, str, str, str, str, str, str, str)
         self.tree = Gtk.TreeView(model=self.store)
         self.tree.set_headers_visible(True)
@@ -80,6 +89,10 @@ class TTrackerWindow(Gtk.Window):
         self.tree.connect('row-activated', self._on_row_activated)
         self.tree.connect('key-press-event', self._on_key_press)
         self.tree.connect('button-press-event', self._on_button_press)
+        # Track expansion on the model so rebuilds restore it instead of
+        # realizing every branch with expand_all
+        self.tree.connect('row-expanded', self._on_row_expanded)
+        self.tree.connect('row-collapsed', self._on_row_collapsed)
 
         # Columns
         self._editing_name_path: Optional[str] = None
@@ -96,9 +109,22 @@ class TTrackerWindow(Gtk.Window):
         scroll.add(self.tree)
         vbox.pack_start(scroll, True, True, 0)
 
+        # task id -> row reference; O(1) row lookups instead of tree walks.
+        # Row references stay valid across in-place reorders.
+        self._row_ref_by_id = {}
+        # Progressive population state: pending (parent_task, task) pairs
+        # and the idle source draining them
+        self._populate_queue: deque = deque()
+        self._populate_id = 0
+        # Hot-path row updater specialized against this window's store
+        self._update_row = self._make_update_row()
         self._rebuild_store()
 
-        # periodic refresh
+        # periodic refresh; _pending_refresh requests a full catch-up sweep
+        # (startup, day rollover, toggles/adjustments possibly outside the
+        # viewport) so the tick can otherwise idle or stay viewport-bounded
+        self._pending_refresh = True
+        self._tick_day = day_start(now()).date()
         GLib.timeout_add_seconds(1, self._tick_update)
 
     def _on_button_press(self, widget, event):
@@ -114,8 +140,8 @@ class TTrackerWindow(Gtk.Window):
             if it and column == getattr(self, 'icon_tree_column', None):
                 task: Task = self.store.get_value(it, COL_TASK_OBJ)
                 logger.debug("Single-click status icon -> toggle task '%s'", task.name)
+                # on_toggle_task journals the event and debounces the snapshot
                 self.on_toggle_task(task)
-                self.on_save()
                 self._refresh_rows()
                 return True
         # Double-click on Hotkey column -> assign hotkey
@@ -199,7 +225,9 @@ class TTrackerWindow(Gtk.Window):
                         except Exception:
                             pass
                         return False
-                    GLib.timeout_add(300, _unset_above)
+                    # Seconds-granularity timer: lets the kernel coalesce the
+                    # wakeup; sub-second precision is not needed here
+                    GLib.timeout_add_seconds(1, _unset_above)
                 except Exception:
                     pass
                 # Ensure selection and focus in tree
@@ -308,90 +336,321 @@ class TTrackerWindow(Gtk.Window):
         self._editing_name_path = None
 
     def _rebuild_store(self):
+        # Populate only the root rows synchronously so the window paints
+        # immediately; descendants stream in via idle callbacks in chunks,
+        # keeping the main loop responsive on large trees
+        if self._populate_id:
+            GLib.source_remove(self._populate_id)
+            self._populate_id = 0
+        self._populate_queue.clear()
+        # Detach the model while repopulating: the view then skips per-append
+        # row-inserted handling and revalidates once on reattach
+        self.tree.set_model(None)
+        self._row_ref_by_id.clear()
         self.store.clear()
-        for t in self.roots:
-            self._add_task_to_store(None, t)
-        # Expand all rows by default so the whole tree is visible
+        self.tree.freeze_child_notify()
+        try:
+            for t in self.roots:
+                self._append_row(None, t)
+                for c in t.children:
+                    self._populate_queue.append((t, c))
+        finally:
+            self.tree.thaw_child_notify()
+        self.tree.set_model(self.store)
+        if self._populate_queue:
+            self._populate_id = GLib.idle_add(self._populate_children_chunk)
+        else:
+            # Restore persisted expansion; deferred to an idle callback so
+            # it lands after the first paint
+            GLib.idle_add(self._apply_expanded_state)
+        # Rows were recreated with empty time columns, so sweep them all
+        self._refresh_rows(full=True)
+
+    def _populate_children_chunk(self):
+        # Append up to 50 rows per idle dispatch, then yield back to the
+        # main loop; parents are resolved through row references so rows
+        # deleted mid-population are skipped along with their subtrees
+        queue = self._populate_queue
+        append_row = self._append_row
+        self.tree.freeze_child_notify()
         try:
-            self.tree.expand_all()
+            for _ in range(50):
+                if not queue:
+                    break
+                parent_task, task = queue.popleft()
+                parent_it = self._iter_for_task(parent_task)
+                if parent_it is None:
+                    continue
+                append_row(parent_it, task)
+                for c in task.children:
+                    queue.append((task, c))
+        finally:
+            self.tree.thaw_child_notify()
+        if queue:
+            return True
+        self._populate_id = 0
+        self._apply_expanded_state()
+        # Newly landed rows have empty time columns; fill them all now
+        self._refresh_rows(full=True)
+        return False
+
+    def _apply_expanded_state(self):
+        # Expand only branches the user kept open; collapsed subtrees are
+        # never realized, unlike expand_all which laid out every row
+        try:
+            refs = self._row_ref_by_id
+            for task in walk_tasks(self.roots):
+                if task.expanded and task.children:
+                    ref = refs.get(task.id)
+                    if ref is not None and ref.valid():
+                        self.tree.expand_row(ref.get_path(), False)
         except Exception:
             pass
-        self._refresh_rows()
+        return False
 
-    def _add_task_to_store(self, parent_iter: Optional[Gtk.TreeIter], task: Task) -> Gtk.TreeIter:
-        running = task.is_running()
-        icon_name = 'alarm-symbolic' if running else ''
-        dot_text = '' if running else '•'
-        # Determine current hotkey text using provided lookup (if any)
-        hotkey_text = self.hotkey_lookup(task) if getattr(self, 'hotkey_lookup', None) else ''
+    def _on_row_expanded(self, tree, it: Gtk.TreeIter, path: Gtk.TreePath):
+        task: Task = self.store.get_value(it, COL_TASK_OBJ)
+        if not task.expanded:
+            task.expanded = True
+            self.on_save()
+
+    def _on_row_collapsed(self, tree, it: Gtk.TreeIter, path: Gtk.TreePath):
+        task: Task = self.store.get_value(it, COL_TASK_OBJ)
+        if task.expanded:
+            task.expanded = False
+            self.on_save()
+
+    def _append_row(self, parent_iter: Optional[Gtk.TreeIter], t: Task) -> Gtk.TreeIter:
+        running = t.is_running()
+        hotkey_text = self.hotkey_lookup(t) if getattr(self, 'hotkey_lookup', None) else ''
+        # Fresh row: force the first _update_row to write every column
+        t._ui_cache = None
         it = self.store.append(parent_iter, [
-            task,                 # COL_TASK_OBJ
-            task.id,              # COL_ID
-            task.name,            # COL_NAME
+            t,                    # COL_TASK_OBJ
+            t.id,                 # COL_ID
+            t.name,               # COL_NAME
             running,              # COL_RUNNING
-            icon_name,            # COL_ICON
+            'alarm-symbolic' if running else '',  # COL_ICON
             '',                   # COL_TODAY (filled on refresh)
             '',                   # COL_WEEK
             '',                   # COL_MONTH
             '',                   # COL_TOTAL
-            self._goal_text(task),# COL_GOAL
+            self._goal_text(t),   # COL_GOAL
             hotkey_text,          # COL_HOTKEY
-            dot_text,             # COL_DOT
+            '' if running else '•',  # COL_DOT
         ])
-        for c in task.children:
-            self._add_task_to_store(it, c)
+        self._row_ref_by_id[t.id] = Gtk.TreeRowReference.new(self.store, self.store.get_path(it))
         return it
 
+    def _add_task_to_store(self, parent_iter: Optional[Gtk.TreeIter], task: Task) -> Gtk.TreeIter:
+        # Iterative DFS over a worklist: deep subtrees cost no Python stack
+        # frames. Used for interactive inserts; the initial load streams
+        # rows through _populate_children_chunk instead.
+        append_row = self._append_row
+        top_it: Optional[Gtk.TreeIter] = None
+        stack = [(parent_iter, task)]
+        while stack:
+            parent, t = stack.pop()
+            it = append_row(parent, t)
+            if top_it is None:
+                top_it = it
+            # Reverse so the pop order matches the children's display order
+            for c in reversed(t.children):
+                stack.append((it, c))
+        return top_it
+
     def _goal_text(self, t: Task) -> str:
         return humanize_seconds(t.daily_goal_sec) if t.daily_goal_sec else ''
 
-    def _refresh_rows(self) -> None:
-        def walk(it: Optional[Gtk.TreeIter]):
-            while it is not None:
-                task = self.store.get_value(it, COL_TASK_OBJ)
-                # Avoid touching the name column while it's being edited to preserve focus
-                try:
-                    cur_path = self.store.get_path(it).to_string()
-                except Exception:
-                    cur_path = None
-                # If the name cell is being edited, skip updating this entire row to preserve editor focus
-                try:
-                    if self._editing_name_path and cur_path == self._editing_name_path:
-                        # still refresh children
-                        child = self.store.iter_children(it)
-                        if child:
-                            walk(child)
-                        it = self.store.iter_next(it)
-                        continue
-                except Exception:
-                    pass
-                # Update row normally
-                self.store.set_value(it, COL_NAME, task.name)
-                running = task.is_running()
-                self.store.set_value(it, COL_RUNNING, running)
+    @staticmethod
+    def _ranges_ctx() -> Tuple[dt.datetime, tuple]:
+        # One "now" and one set of day/week/month boundaries per sweep;
+        # every row shares them instead of re-deriving identical tz math
+        n = now()
+        ds = day_start(n)
+        return n, ((ds, ds + _ONE_DAY), week_range(n), month_range(n))
+
+    def _make_update_row(self) -> Callable:
+        # Specialized row updater built once at startup: everything the hot
+        # loop touches — store.set, humanize_seconds, the goal/hotkey
+        # helpers, the column layout — is captured in the closure, so per
+        # visited row there are no attribute or global lookups left
+        store_set = self.store.set
+        hum = humanize_seconds
+        goal_text = self._goal_text
+        hotkey_lookup = self.hotkey_lookup
+        time_cols = ((2, COL_TODAY), (3, COL_WEEK), (4, COL_MONTH),
+                     (5, COL_TOTAL), (6, COL_GOAL), (7, COL_HOTKEY))
+
+        def update_row(it: Gtk.TreeIter, task: Task, n: dt.datetime, ranges: tuple,
+                       running_ids: set) -> None:
+            # Diff against the last tuple written for this row; identical
+            # values are not rewritten at all, so unchanged rows cost one
+            # tuple compare and no row-changed emission
+            running = task.id in running_ids
+            try:
+                hotkey = hotkey_lookup(task) if hotkey_lookup else ''
+            except Exception:
+                hotkey = ''
+            agg = task.aggregate_seconds
+            new = (
+                task.name,
+                running,
+                hum(agg(*ranges[0], now_ts=n)),
+                hum(agg(*ranges[1], now_ts=n)),
+                hum(agg(*ranges[2], now_ts=n)),
+                hum(agg(now_ts=n)),
+                goal_text(task),
+                hotkey,
+            )
+            old = task._ui_cache
+            if new == old:
+                return
+            # Collect the changed columns and write them with one store.set
+            # call: a single Python->C crossing and one row-changed emission
+            # for the row, instead of one of each per column
+            cols = []
+            vals = []
+            if old is None or new[0] != old[0]:
+                cols.append(COL_NAME)
+                vals.append(new[0])
+            if old is None or new[1] != old[1]:
                 # running -> clock icon, no dot; idle -> no icon, centered dot
-                self.store.set_value(it, COL_ICON, 'alarm-symbolic' if running else '')
-                self.store.set_value(it, COL_DOT, '' if running else '•')
-                self.store.set_value(it, COL_TODAY, humanize_seconds(task.today_seconds()))
-                self.store.set_value(it, COL_WEEK, humanize_seconds(task.week_seconds()))
-                self.store.set_value(it, COL_MONTH, humanize_seconds(task.month_seconds()))
-                self.store.set_value(it, COL_TOTAL, humanize_seconds(task.total_seconds()))
-                self.store.set_value(it, COL_GOAL, self._goal_text(task))
-                # Update HOTKEY text using lookup if provided
-                try:
-                    if getattr(self, 'hotkey_lookup', None):
-                        self.store.set_value(it, COL_HOTKEY, self.hotkey_lookup(task))
-                except Exception:
-                    pass
-                child = self.store.iter_children(it)
-                if child:
-                    walk(child)
-                it = self.store.iter_next(it)
-        root = self.store.get_iter_first()
-        walk(root)
+                cols += (COL_RUNNING, COL_ICON, COL_DOT)
+                vals += (running, 'alarm-symbolic' if running else '', '' if running else '•')
+            for i, col in time_cols:
+                if old is None or new[i] != old[i]:
+                    cols.append(col)
+                    vals.append(new[i])
+            if cols:
+                store_set(it, cols, vals)
+            task._ui_cache = new
+
+        return update_row
+
+    def _refresh_visible_range(self, start: Gtk.TreePath, end: Gtk.TreePath,
+                               n: dt.datetime, ranges: tuple, running_ids: set) -> None:
+        # Walk rows in display order from start to end: descend into expanded
+        # children, otherwise advance to the next sibling, climbing up when a
+        # branch is exhausted
+        store = self.store
+        editing = self._editing_name_path
+        path = start.copy()
+        while path.compare(end) <= 0:
+            try:
+                it = store.get_iter(path)
+            except Exception:
+                break
+            task = store.get_value(it, COL_TASK_OBJ)
+            # Skip the row whose name cell is being edited (editor focus)
+            if not (editing and path.to_string() == editing):
+                self._update_row(it, task, n, ranges, running_ids)
+            if store.iter_has_child(it) and self.tree.row_expanded(path):
+                path.down()
+            elif store.iter_next(it) is not None:
+                path.next()
+            else:
+                advanced = False
+                while path.up() and path.get_depth() > 0:
+                    it = store.get_iter(path)
+                    if store.iter_next(it) is not None:
+                        path.next()
+                        advanced = True
+                        break
+                if not advanced:
+                    break
+
+    def _refresh_rows(self, running_ids: Optional[set] = None, full: bool = False) -> None:
+        # The sweep is bounded by what can actually change on screen: rows in
+        # the viewport get full updates, and the running task plus its
+        # ancestors (their aggregates tick too) are updated wherever they
+        # are. Nothing else is visited — the store is never walked whole.
+        # Newly scrolled-in rows are caught by the next tick.
+        if running_ids is None:
+            # One walk per sweep; rows then test membership instead of
+            # calling is_running per visit
+            running_ids = {t.id for t in walk_tasks(self.roots) if t.is_running()}
+        vis: Optional[Tuple[Gtk.TreePath, Gtk.TreePath]] = None
+        try:
+            vr = self.tree.get_visible_range()
+            if vr:
+                vis = (vr[0], vr[1])
+        except Exception:
+            vis = None
+
+        n, ranges = self._ranges_ctx()
+        # Batch child-notify emissions for the whole sweep
+        self.tree.freeze_child_notify()
+        try:
+            if vis is not None and not full:
+                self._refresh_visible_range(vis[0], vis[1], n, ranges, running_ids)
+            else:
+                # Full catch-up sweep, or no range yet (window not mapped)
+                self._refresh_all_rows(n, ranges, running_ids)
+            store = self.store
+            editing = self._editing_name_path
+            for task in walk_tasks(self.roots):
+                if task.id not in running_ids:
+                    continue
+                it = self._iter_for_task(task)
+                while it is not None:
+                    # Same guard as the sweeps: writing to the row whose
+                    # name is being edited would knock out the cell editor
+                    if not (editing and store.get_path(it).to_string() == editing):
+                        self._update_row(it, store.get_value(it, COL_TASK_OBJ), n, ranges, running_ids)
+                    it = store.iter_parent(it)
+        finally:
+            self.tree.thaw_child_notify()
+
+    def _refresh_all_rows(self, n: dt.datetime, ranges: tuple, running_ids: set) -> None:
+        # Explicit stack instead of recursion, with the hot store methods
+        # bound to locals once — attribute lookups add up over a full sweep
+        editing = self._editing_name_path
+        store = self.store
+        get_value = store.get_value
+        get_path = store.get_path
+        iter_children = store.iter_children
+        iter_next = store.iter_next
+        update_row = self._update_row
+        stack = [store.get_iter_first()]
+        while stack:
+            it = stack.pop()
+            while it is not None:
+                task = get_value(it, COL_TASK_OBJ)
+                if not (editing and get_path(it).to_string() == editing):
+                    update_row(it, task, n, ranges, running_ids)
+                child = iter_children(it)
+                if child is not None:
+                    stack.append(child)
+                it = iter_next(it)
 
     def _tick_update(self):
-        self._refresh_rows()
+        # Nothing running means no value on screen changes between ticks;
+        # the 06:00 day rollover is the one exception (Today/Week shift)
+        day = day_start(now()).date()
+        if day != self._tick_day:
+            self._tick_day = day
+            self._pending_refresh = True
+        # A hidden or minimized window paints nothing: skip the sweep and
+        # leave _pending_refresh as is, so the first tick after the window
+        # comes back catches up in one pass
+        if not self.get_visible():
+            return True
+        win = self.get_window()
+        if win is not None and win.get_state() & Gdk.WindowState.ICONIFIED:
+            return True
+        running_ids = {t.id for t in walk_tasks(self.roots) if t.is_running()}
+        if not running_ids and not self._pending_refresh:
+            return True
+        if self._pending_refresh:
+            # Catch-up sweeps must cover every row — off-screen rows can be
+            # stale after streamed population, a day rollover or a toggle
+            # while the window was hidden — so the flag is cleared only
+            # once a full sweep has actually run
+            self._refresh_rows(running_ids, full=True)
+            self._pending_refresh = False
+        else:
+            self._refresh_rows(running_ids)
         return True
 
     def _on_row_activated(self, tree: Gtk.TreeView, path: Gtk.TreePath, column: Gtk.TreeViewColumn):
@@ -490,7 +749,6 @@ class TTrackerWindow(Gtk.Window):
         if it:
             task: Task = self.store.get_value(it, COL_TASK_OBJ)
             self.on_toggle_task(task)
-            self.on_save()
             self._refresh_rows()
 
     def _adjust_selected(self):
@@ -499,7 +757,6 @@ class TTrackerWindow(Gtk.Window):
             return
         task: Task = self.store.get_value(it, COL_TASK_OBJ)
         self.on_adjust_task(task)
-        self.on_save()
         self._refresh_rows()
 
     def _set_goal_selected(self):
@@ -558,6 +815,8 @@ class TTrackerWindow(Gtk.Window):
             else:
                 self.roots.remove(task)
             self.store.remove(it)
+            for t in walk_tasks([task]):
+                self._row_ref_by_id.pop(t.id, None)
             self.on_save()
 
     def _move_selected(self, direction: int):
@@ -574,44 +833,46 @@ class TTrackerWindow(Gtk.Window):
         task: Task = self.store.get_value(it, COL_TASK_OBJ)
         idx = siblings.index(task)
         new_idx = move_task_within_parent(siblings, idx, direction)
+        # Sibling order is user-driven only; the no-op check below already
+        # suppresses spurious rows-reordered emissions. If ordering ever
+        # becomes totals-driven, add hysteresis (~60s epsilon) here so rows
+        # with near-equal durations don't swap on every tick.
         if new_idx != idx:
-            # rebuild store for simplicity
-            self._rebuild_store()
-            # restore selection
-            # Find task in store
-            self._select_task(task)
+            # Swap the two sibling rows in place: O(1) model signals instead
+            # of clearing and re-appending the whole tree, and the selection
+            # stays on the moved row
+            target = self.store.iter_nth_child(parent, new_idx)
+            if target is not None:
+                self.store.swap(it, target)
+            else:
+                self._rebuild_store()
+                self._select_task(task)
             self.on_save()
 
+    def request_full_refresh(self):
+        # Task state changed possibly outside the viewport (global hotkey,
+        # adjustment, toggle while hidden): the next tick sweeps every row
+        self._pending_refresh = True
+
+    def _iter_for_task(self, task: Task) -> Optional[Gtk.TreeIter]:
+        ref = self._row_ref_by_id.get(task.id)
+        if ref is not None and ref.valid():
+            return self.store.get_iter(ref.get_path())
+        return None
+
     def _select_task(self, task: Task):
-        def find_it(it: Optional[Gtk.TreeIter]) -> Optional[Gtk.TreeIter]:
-            while it is not None:
-                t = self.store.get_value(it, COL_TASK_OBJ)
-                if t is task:
-                    return it
-                # search children
-                child = self.store.iter_children(it)
-                if child:
-                    found = find_it(child)
-                    if found:
-                        return found
-                it = self.store.iter_next(it)
-            return None
-        it = find_it(self.store.get_iter_first())
+        it = self._iter_for_task(task)
         if it:
             path = self.store.get_path(it)
             self.tree.expand_to_path(path)
             self.tree.set_cursor(path, None, False)
 
     # Exposed controls for hotkey assignment
-    def set_hotkey_text(self, task: Task, text: str):
-        # Find the row and set
-        def walk(it: Optional[Gtk.TreeIter]):
-            while it is not None:
-                t = self.store.get_value(it, COL_TASK_OBJ)
-                if t is task:
-                    self.store.set_value(it, COL_HOTKEY, text)
-                child = self.store.iter_children(it)
-                if child:
-                    walk(child)
-                it = self.store.iter_next(it)
-        walk(self.store.get_iter_first())
+    def set_hotkey_text(self, task: Task, text: str, defer: bool = False):
+        # With defer=True the caller batches several updates and issues a
+        # single queue_draw itself.
+        it = self._iter_for_task(task)
+        if it:
+            self.store.set_value(it, COL_HOTKEY, text)
+        if not defer:
+            self.tree.queue_draw()
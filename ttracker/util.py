@@ -1,10 +1,12 @@
 import datetime as dt
-import re
+import functools
 from typing import Tuple
 
 # The "day" boundary is at 06:00 local time
 DAY_CUTOFF_HOUR = 6
 
+_ONE_DAY = dt.timedelta(days=1)
+
 
 def now() -> dt.datetime:
     return dt.datetime.now().astimezone()
@@ -44,12 +46,12 @@ def month_range(ts: dt.datetime) -> Tuple[dt.datetime, dt.datetime]:
     return first_day, next_month
 
 
+@functools.lru_cache(maxsize=8192)
 def humanize_seconds(sec: int) -> str:
+    # Memoized: the same totals are re-formatted every UI tick
     neg = sec < 0
-    sec = abs(int(sec))
-    h = sec // 3600
-    m = (sec % 3600) // 60
-    s = sec % 60
+    h, rem = divmod(abs(int(sec)), 3600)
+    m, s = divmod(rem, 60)
     if h > 0:
         body = f"{h}h {m}m"
     elif m > 0:
@@ -59,8 +61,9 @@ def humanize_seconds(sec: int) -> str:
     return f"-{body}" if neg else body
 
 
-_DURATION_RE = re.compile(r"^\s*([+-]?)\s*(?:(\d+(?:\.\d+)?)\s*h)?\s*(?:(\d+(?:\.\d+)?)\s*m)?\s*(?:(\d+(?:\.\d+)?)\s*s)?\s*$",
-                          re.IGNORECASE)
+# Units must appear in h -> m -> s order, each at most once
+_UNIT_SECONDS = {'h': 3600.0, 'm': 60.0, 's': 1.0}
+_UNIT_ORDER = {'h': 0, 'm': 1, 's': 2}
 
 
 def parse_duration_delta(s: str) -> int:
@@ -69,22 +72,47 @@ def parse_duration_delta(s: str) -> int:
     Returns signed seconds as int.
     Raises ValueError on invalid input.
     """
-    m = _DURATION_RE.match(s)
-    if not m:
-        raise ValueError("Invalid duration format")
-    sign_str, h_s, m_s, s_s = m.groups()
+    i, n = 0, len(s)
+    while i < n and s[i].isspace():
+        i += 1
+    sign = 1.0
+    if i < n and s[i] in '+-':
+        if s[i] == '-':
+            sign = -1.0
+        i += 1
     total = 0.0
-    if h_s:
-        total += float(h_s) * 3600
-    if m_s:
-        total += float(m_s) * 60
-    if s_s:
-        total += float(s_s)
-    if not (h_s or m_s or s_s):
+    last_unit = -1
+    while True:
+        while i < n and s[i].isspace():
+            i += 1
+        if i >= n:
+            break
+        j = i
+        while j < n and '0' <= s[j] <= '9':
+            j += 1
+        if j == i:
+            raise ValueError("Invalid duration format")
+        k = j
+        if k < n and s[k] == '.':
+            k += 1
+            frac = k
+            while k < n and '0' <= s[k] <= '9':
+                k += 1
+            if k == frac:
+                raise ValueError("Invalid duration format")
+        value = float(s[i:k])
+        while k < n and s[k].isspace():
+            k += 1
+        unit = s[k].lower() if k < n else ''
+        order = _UNIT_ORDER.get(unit)
+        if order is None or order <= last_unit:
+            raise ValueError("Invalid duration format")
+        total += value * _UNIT_SECONDS[unit]
+        last_unit = order
+        i = k + 1
+    if last_unit < 0:
         raise ValueError("Specify at least one of hours/minutes/seconds")
-    if sign_str == '-':
-        total = -total
-    return int(round(total))
+    return int(round(sign * total))
 
 
 def split_by_day_boundary(start: dt.datetime, end: dt.datetime) -> Tuple[Tuple[dt.datetime, dt.datetime], ...]:
@@ -94,14 +122,14 @@ def split_by_day_boundary(start: dt.datetime, end: dt.datetime) -> Tuple[Tuple[d
     """
     if end <= start:
         return ()
+    # Boundaries are a regular 24h apart, so resolve the first one and
+    # stride from there instead of recomputing day_start per fragment
     frags = []
     cur = start
-    while True:
-        ds = day_start(cur)
-        de = ds + dt.timedelta(days=1)
-        segment_end = min(de, end)
-        frags.append((cur, segment_end))
-        if segment_end >= end:
-            break
-        cur = segment_end
+    de = day_start(start) + _ONE_DAY
+    while de < end:
+        frags.append((cur, de))
+        cur = de
+        de = de + _ONE_DAY
+    frags.append((cur, end))
     return tuple(frags)